@@ -1,13 +1,16 @@
 using UnityEngine;
 using TMPro;
+using System;
+using System.Text;
 using System.Net;
 using System.Net.Sockets;
-using System.Text;
 
 public class GyroscopeReader : MonoBehaviour
 {
     public TextMeshProUGUI dataDisplayText;
     public Transform headAnchor;
+    // Send "pitch,yaw" text instead of binary, for receivers that predate the binary format
+    public bool sendLegacyText = false;
 
     private UdpClient udpClient;
     private string pcIPAddress = "192.168.0.196"; // Your computer's IP
@@ -17,6 +20,9 @@ public class GyroscopeReader : MonoBehaviour
     private float sendInterval = 0.05f; // Sends data 20 times per second (1 / 0.05 = 20)
     private float timeSinceLastSend = 0f;
 
+    // Packet: pitch, yaw as little-endian float32 (8 bytes)
+    private readonly byte[] packet = new byte[8];
+
     void Start()
     {
         udpClient = new UdpClient();
@@ -43,9 +49,16 @@ public class GyroscopeReader : MonoBehaviour
                 dataDisplayText.text = $"Orientation (Euler):\nPitch: {eulerAngles.x:F1}, Yaw: {eulerAngles.y:F1}";
             }
             
-            string dataToSend = $"{eulerAngles.x},{eulerAngles.y}";
-            byte[] dataBytes = Encoding.UTF8.GetBytes(dataToSend);
-            udpClient.Send(dataBytes, dataBytes.Length, pcIPAddress, port);
+            if (sendLegacyText)
+            {
+                byte[] text = Encoding.UTF8.GetBytes($"{eulerAngles.x},{eulerAngles.y}");
+                udpClient.Send(text, text.Length, pcIPAddress, port);
+                return;
+            }
+
+            Buffer.BlockCopy(BitConverter.GetBytes(eulerAngles.x), 0, packet, 0, 4);
+            Buffer.BlockCopy(BitConverter.GetBytes(eulerAngles.y), 0, packet, 4, 4);
+            udpClient.Send(packet, packet.Length, pcIPAddress, port);
         }
     }
 
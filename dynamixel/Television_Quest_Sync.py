@@ -1,9 +1,13 @@
+import math
+import sys
 import time
 import numpy as np
 import socket
-from select import select
+import selectors
+import struct
 
 from dynamixel_robot import DynamixelRobot
+from numerics import njit
 
 # --- Configuration ---
 PORT_NAME = "COM4"
@@ -12,6 +16,11 @@ JOINT_SIGNS = [1, 1, -1]
 BAUDRATE = 57600
 LISTEN_IP = "0.0.0.0"
 LISTEN_PORT = 9050
+# Busy-poll the NIC for up to this many microseconds on receive (Linux only).
+# Values above /proc/sys/net/core/busy_read require CAP_NET_ADMIN.
+BUSY_POLL_USEC = 50
+# Small kernel receive buffer so stale packets are dropped by the OS, not drained in Python
+RECV_BUFFER_BYTES = 2048
 YAW_SENSITIVITY = 1.0
 PITCH_SENSITIVITY = -1.0
 
@@ -25,9 +34,71 @@ LR_LIMITS_RAD = (-2.9, 2.9)
 ID1_LIMITS_RAD = (-2.24, -1.01)
 ID3_LIMITS_RAD = (0.98, 2.16)
 
+# Per-joint bounds, ordered like JOINT_IDS
+JOINT_LOWER_LIMITS = np.array([LR_LIMITS_RAD[0], ID1_LIMITS_RAD[0], ID3_LIMITS_RAD[0]])
+JOINT_UPPER_LIMITS = np.array([LR_LIMITS_RAD[1], ID1_LIMITS_RAD[1], ID3_LIMITS_RAD[1]])
+# Head offset (deg) to joint offset (rad)
+YAW_GAIN = math.pi / 180.0 * YAW_SENSITIVITY
+PITCH_GAIN = math.pi / 180.0 * PITCH_SENSITIVITY
+
 # --- Robustness Settings ---
 STALE_DATA_TIMEOUT = 1.0  # Seconds before data is considered stale
+POLL_INTERVAL = 0.005  # Max seconds to wait for a packet before looping
 MIN_COMMAND_CHANGE = 0.005  # Radians (about 0.3 degrees) - prevents motor jitter
+MIN_COMMAND_CHANGE_SQ = MIN_COMMAND_CHANGE ** 2  # Compared against the squared distance
+
+# --- Homing Settings ---
+HOMING_STEP_RAD = 0.02  # Max joint-space step per command when returning to zero
+HOMING_PERIOD = 0.02  # Seconds between homing commands
+
+# --- Logging Settings ---
+PRINT_INTERVAL = 0.1  # Min seconds between status lines; console writes are slow on Windows
+
+# --- Debug Settings ---
+DEBUG_VERIFY = False  # Read back the joint state after each command and report the RTT
+
+# Quest packets are two little-endian float32s: pitch, yaw (degrees)
+QUEST_PACKET = struct.Struct('<2f')
+# Every byte a legacy "pitch,yaw" text packet can contain
+LEGACY_TEXT_BYTES = b"0123456789+-.,eE "
+COMMA = ord(",")
+
+def parse_quest_packet(data):
+    """
+    Return (pitch, yaw) in degrees from a Quest packet.
+    Packets made only of number characters and a comma are the legacy "pitch,yaw"
+    text sent by older headset builds (which can be 8 bytes long too, e.g. "90,180.5");
+    other 8-byte packets are the binary format.
+    Raises ValueError or IndexError on malformed packets.
+    """
+    # Binary packets without a comma byte unpack straight from the view, with no copy
+    if len(data) == QUEST_PACKET.size and COMMA not in data:
+        return QUEST_PACKET.unpack_from(data)
+    raw = bytes(data)
+    comma = raw.find(b',')
+    is_text = comma >= 0 and not raw.translate(None, LEGACY_TEXT_BYTES)
+    if not is_text and len(raw) == QUEST_PACKET.size:
+        return QUEST_PACKET.unpack(raw)
+    # float() parses ASCII bytes directly, so no decode/split into str objects
+    if comma < 0:
+        raise ValueError("malformed Quest packet")
+    return float(raw[:comma]), float(raw[comma + 1:])
+
+@njit(cache=True, fastmath=True)
+def compute_joint_command(pitch_raw, yaw_raw, zero_pitch, zero_yaw, base, lower, upper,
+                          yaw_gain, pitch_gain, out):
+    """
+    Map a head pose (deg) to clipped joint targets (rad), written into `out`.
+    Returns the wrapped (yaw, pitch) offsets in degrees for logging.
+    """
+    yaw_offset = (yaw_raw - zero_yaw + 180.0) % 360.0 - 180.0
+    pitch_offset = (pitch_raw - zero_pitch + 180.0) % 360.0 - 180.0
+    out[0] = base[0] - yaw_offset * yaw_gain
+    out[1] = base[1] + pitch_offset * pitch_gain
+    out[2] = base[2] + pitch_offset * pitch_gain
+    for i in range(3):
+        out[i] = min(max(out[i], lower[i]), upper[i])
+    return yaw_offset, pitch_offset
 
 def main():
     robot = None
@@ -36,8 +107,7 @@ def main():
             joint_ids=JOINT_IDS, joint_signs=JOINT_SIGNS, real=True,
             port=PORT_NAME, baudrate=BAUDRATE
         )
-        robot.set_torque_mode(True)
-        time.sleep(0.2)
+        robot.set_torque_mode(True)  # Returns once applied; joints are valid after construction
         robot_zero_pos = robot.get_joint_state()
         if robot_zero_pos is None:
             raise ConnectionError("Could not read robot's starting position.")
@@ -68,8 +138,20 @@ def main():
         return
 
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER_BYTES)
     sock.bind((LISTEN_IP, LISTEN_PORT))
+    if sys.platform.startswith("linux"):
+        try:
+            # SO_BUSY_POLL is 46 on Linux but not exported by the socket module.
+            sock.setsockopt(socket.SOL_SOCKET, getattr(socket, "SO_BUSY_POLL", 46), BUSY_POLL_USEC)
+        except OSError as e:
+            print(f"⚠️ Could not enable SO_BUSY_POLL: {e}")
     sock.setblocking(False)
+    sel = selectors.DefaultSelector()
+    sel.register(sock, selectors.EVENT_READ)
+    # Every datagram is received into this buffer; binary packets are parsed from it in place
+    recv_buf = bytearray(1024)
+    recv_view = memoryview(recv_buf)
     print("\n--- Listening for Quest data ---")
     print("Keep head still to establish Quest zero point...")
 
@@ -77,13 +159,10 @@ def main():
     quest_zero_pitch, quest_zero_yaw = 0, 0
     initial_data_found = False
     for _ in range(50):  # Try for 5 seconds (50 * 0.1s)
-        ready, _, _ = select([sock], [], [], 0.1)
-        if ready:
+        if sel.select(0.1):
             try:
-                data, _ = sock.recvfrom(1024)
-                values = data.decode('utf-8').split(',')
-                quest_zero_pitch = float(values[0])
-                quest_zero_yaw = float(values[1])
+                nbytes, _ = sock.recvfrom_into(recv_buf)
+                quest_zero_pitch, quest_zero_yaw = parse_quest_packet(recv_view[:nbytes])
                 print(f"✅ Quest zero established at Pitch: {quest_zero_pitch:.1f}, Yaw: {quest_zero_yaw:.1f}")
                 initial_data_found = True
                 break
@@ -93,97 +172,79 @@ def main():
     if not initial_data_found:
         print("❌ Error: Could not establish zero point from Quest.")
         if robot: robot.close()
+        sel.close()
         sock.close()
         return
         
     print("\n✅ Ready. Move your head to control the robot. Press Ctrl+C to quit.")
 
     last_command_time = time.time()
+    last_print_time = 0.0
     last_sent_command = robot_zero_pos.copy()
+    # Scratch buffers reused for every packet
+    final_command = np.empty(3)
+    command_delta = np.empty(3)
+    # Compile (or load from cache) the kernel now rather than on the first packet
+    compute_joint_command(0.0, 0.0, 0.0, 0.0, robot_zero_pos, JOINT_LOWER_LIMITS,
+                          JOINT_UPPER_LIMITS, YAW_GAIN, PITCH_GAIN, final_command)
 
     try:
         while True:
-            latest_data = None
+            # Drain the socket; the buffer ends up holding the newest datagram
+            nbytes = 0
             while True:
-                ready, _, _ = select([sock], [], [], 0)
-                if not ready: break
-                latest_data, _ = sock.recvfrom(1024)
+                try:
+                    nbytes, _ = sock.recvfrom_into(recv_buf)
+                except BlockingIOError:
+                    break
 
-            if latest_data:
+            if nbytes:
                 last_command_time = time.time()
                 try:
-                    values = latest_data.decode('utf-8').split(',')
-                    current_pitch_raw = float(values[0])
-                    current_yaw_raw = float(values[1])
+                    current_pitch_raw, current_yaw_raw = parse_quest_packet(recv_view[:nbytes])
                 except (ValueError, IndexError):
                     continue
 
-                yaw_offset_deg = current_yaw_raw - quest_zero_yaw
-                yaw_offset_deg = (yaw_offset_deg + 180) % 360 - 180
+                yaw_offset_deg, pitch_offset_deg = compute_joint_command(
+                    current_pitch_raw, current_yaw_raw, quest_zero_pitch, quest_zero_yaw,
+                    robot_zero_pos, JOINT_LOWER_LIMITS, JOINT_UPPER_LIMITS,
+                    YAW_GAIN, PITCH_GAIN, final_command
+                )
 
-                pitch_offset_deg = current_pitch_raw - quest_zero_pitch
-                pitch_offset_deg = (pitch_offset_deg + 180) % 360 - 180
+                # --- Only send command if it has changed enough ---
+                np.subtract(final_command, last_sent_command, out=command_delta)
+                if command_delta.dot(command_delta) > MIN_COMMAND_CHANGE_SQ:
+                    try:
+                        if DEBUG_VERIFY:
+                            # Read the state back to measure the hardware round trip
+                            actual_pos, hardware_rtt_ms = robot.command_and_get_rtt(final_command)
+                        else:
+                            robot.command_joint_state(final_command)
+                        np.copyto(last_sent_command, final_command)
 
-                yaw_offset_rad = np.deg2rad(yaw_offset_deg) * YAW_SENSITIVITY
-                pitch_offset_rad = np.deg2rad(pitch_offset_deg) * PITCH_SENSITIVITY
+                        # Rate-limited status line; nothing is formatted unless it is written
+                        now = time.time()
+                        if now - last_print_time > PRINT_INTERVAL:
+                            last_print_time = now
+                            if not DEBUG_VERIFY:
+                                sys.stdout.write(f"Yaw: {yaw_offset_deg:+.1f}° | Pitch: {pitch_offset_deg:+.1f}° | Target: {np.rad2deg(final_command).round(1)} deg\n")
+                            elif actual_pos is not None:
+                                sys.stdout.write(f"Yaw: {yaw_offset_deg:+.1f}° | Pitch: {pitch_offset_deg:+.1f}° | Latency: {hardware_rtt_ms:5.1f} ms\n")
+                            else:
+                                sys.stdout.write("Command Sent | ❌ Can't read position\n")
 
-                target_pos = robot_zero_pos.copy()
-                target_pos[0] -= yaw_offset_rad
-                target_pos[1] += pitch_offset_rad
-                target_pos[2] += pitch_offset_rad
-
-                final_command = np.clip(target_pos,
-                    [LR_LIMITS_RAD[0], ID1_LIMITS_RAD[0], ID3_LIMITS_RAD[0]],
-                    [LR_LIMITS_RAD[1], ID1_LIMITS_RAD[1], ID3_LIMITS_RAD[1]]
-                )
-                
-                # --- Only send command if it has changed enough ---
-                # if np.linalg.norm(final_command - last_sent_command) > MIN_COMMAND_CHANGE:
-                #     try:
-                #         robot.command_joint_state(final_command)
-                #         last_sent_command = final_command
-                        
-                #         # Read actual robot position after command
-                #         time.sleep(0.005)  # Small delay to let robot respond
-                #         actual_pos = robot.get_joint_state()
-                        
-                #         if actual_pos is not None:
-                #             target_deg = np.rad2deg(final_command).round(1)
-                #             actual_deg = np.rad2deg(actual_pos).round(1)
-                #             print(f"Yaw: {yaw_offset_deg:+.1f}° | Pitch: {pitch_offset_deg:+.1f}° | Target: {target_deg} | Actual: {actual_deg}")
-                            
-                #             # Check if robot actually moved
-                #             position_diff = np.linalg.norm(actual_pos - robot_zero_pos)
-                #             if position_diff < 0.01:  # Less than ~0.6 degrees total movement
-                #                 print("⚠️  Robot not moving! Check:")
-                #                 print("   - Power supply to motors")
-                #                 print("   - Motor torque enable")
-                #                 print("   - Cable connections")
-                #         else:
-                #             print(f"Yaw: {yaw_offset_deg:+.1f}° | Pitch: {pitch_offset_deg:+.1f}° | Command Sent | ❌ Can't read position")
-                            
-                #     except Exception as e:
-                #         print(f"⚠️ Error sending command to robot: {e}")
-                try:
-                    # Use the new RTT method
-                    actual_pos, hardware_rtt_ms = robot.command_and_get_rtt(final_command)
-                    last_sent_command = final_command
-                    
-                    if actual_pos is not None:
-                        print(f"Yaw: {yaw_offset_deg:+.1f}° | Pitch: {pitch_offset_deg:+.1f}° | Latency: {hardware_rtt_ms:5.1f} ms")
-                    else:
-                        print("Command Sent | ❌ Can't read position")
-                        
-                except Exception as e:
-                    print(f"⚠️ Error sending command to robot: {e}")
+                    except Exception as e:
+                        print(f"⚠️ Error sending command to robot: {e}")
 
             elif time.time() - last_command_time > STALE_DATA_TIMEOUT:
                 print("🕒 Stale data, returning robot to zero...")
                 robot.command_joint_state(robot_zero_pos)
-                last_sent_command = robot_zero_pos.copy()
+                np.copyto(last_sent_command, robot_zero_pos)
                 last_command_time = time.time() # Reset timer to avoid repeated messages
 
-            time.sleep(0.005)
+            # Block until a packet arrives, the poll interval ends, or the data goes stale
+            stale_in = STALE_DATA_TIMEOUT - (time.time() - last_command_time)
+            sel.select(max(0.0, min(POLL_INTERVAL, stale_in)))
 
     except KeyboardInterrupt:
         print("\nExiting.")
@@ -191,12 +252,18 @@ def main():
         print("\nReturning robot to zero position...")
         if robot:
             try:
-                robot.command_joint_state(robot_zero_pos)
-                time.sleep(1)
+                # Stream a precomputed straight-line trajectory; no read-backs needed
+                distance = np.linalg.norm(robot_zero_pos - last_sent_command)
+                num_steps = max(1, int(np.ceil(distance / HOMING_STEP_RAD)))
+                for pos in np.linspace(last_sent_command, robot_zero_pos, num_steps + 1)[1:]:
+                    robot.command_joint_state(pos)
+                    time.sleep(HOMING_PERIOD)
+                time.sleep(0.5)  # Let the last step settle
                 robot.set_torque_mode(False)
                 robot.close()
             except Exception as e:
                 print(f"⚠️ Error during robot cleanup: {e}")
+        sel.close()
         sock.close()
         print("✅ Done.")
 
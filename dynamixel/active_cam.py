@@ -5,6 +5,7 @@
 # sweep of a joint through a range of angles, printing both commanded and actual joint positions.
 
 import os
+import sys
 import time
 from dataclasses import dataclass
 from typing import Dict, Optional, Sequence, Tuple
@@ -70,6 +71,10 @@ PORT_CONFIG_MAP: Dict[str, DynamixelRobotConfig] = {
     ), 
 }
 
+# Robots already built from PORT_CONFIG_MAP, keyed by port, with the start_joints they were built with.
+# A serial port can only be opened once, so agents on the same port share the robot.
+_ROBOT_CACHE: Dict[str, Tuple[DynamixelRobot, Optional[Tuple[float, ...]]]] = {}
+
 
 # Agent class that wraps a DynamixelRobot and provides a simple interface for action/state.
 # The agent can be initialized with a config or will look up the config based on the port.
@@ -87,13 +92,34 @@ class DynamixelAgent(Agent):
                 port=port, start_joints=start_joints
             )
         else:
-            # If no config is provided, ensure the port exists and is in the config map.
-            assert os.path.exists(port), port
-            assert port in PORT_CONFIG_MAP, f"Port {port} not in config map"
-
-            # Retrieve config for this port and create the robot instance.
-            config = PORT_CONFIG_MAP[port]
-            self._robot = config.make_robot(port=port, start_joints=start_joints)
+            # If no config is provided, the port must be in the config map.
+            if port not in PORT_CONFIG_MAP:
+                raise KeyError(f"Port {port} not in config map")
+            # COM ports are not filesystem paths, so only check for device nodes elsewhere.
+            if sys.platform != "win32":
+                assert os.path.exists(port), port
+
+            # Reuse the robot for this port if one was already created and is still open.
+            key = None if start_joints is None else tuple(np.asarray(start_joints, dtype=float).tolist())
+            cached = _ROBOT_CACHE.get(port)
+            if cached is not None and not cached[0].closed:
+                if cached[1] != key:
+                    raise ValueError(
+                        f"Robot on {port} already exists with start_joints={cached[1]}, got {key}"
+                    )
+                self._robot = cached[0]
+            else:
+                config = PORT_CONFIG_MAP[port]
+                self._robot = config.make_robot(port=port, start_joints=start_joints)
+                _ROBOT_CACHE[port] = (self._robot, key)
+        self._port = port
+
+    def close(self):
+        """Close the robot and drop it from the shared cache."""
+        cached = _ROBOT_CACHE.get(self._port)
+        if cached is not None and cached[0] is self._robot:
+            del _ROBOT_CACHE[self._port]
+        self._robot.close()
 
     def act(self, obs: Dict[str, np.ndarray]) -> np.ndarray: 
         """
@@ -26,9 +26,12 @@ class Agent(Protocol):
 class DummyAgent(Agent):
     def __init__(self, num_dofs: int):
         self.num_dofs = num_dofs
+        # Shared between calls, so it is read-only; callers that need to modify it must copy.
+        self._zeros = np.zeros(num_dofs)
+        self._zeros.setflags(write=False)
 
     def act(self, obs: Dict[str, Any]) -> np.ndarray:
-        return np.zeros(self.num_dofs)
+        return self._zeros
 
 # BimanualAgent: wraps two agents (e.g., for two arms), splits the observation, and concatenates their actions.
 class BimanualAgent(Agent):
@@ -41,11 +44,11 @@ class BimanualAgent(Agent):
         left_obs = {}
         right_obs = {}
         for key, val in obs.items():
-            L = val.shape[0]
-            half_dim = L // 2
-            assert L == half_dim * 2, f"{key} must be even, something is wrong"
+            half_dim, odd = divmod(val.shape[0], 2)
+            assert not odd, f"{key} must be even, something is wrong"
             left_obs[key] = val[:half_dim]
             right_obs[key] = val[half_dim:]
-        return np.concatenate(
-            [self.agent_left.act(left_obs), self.agent_right.act(right_obs)]
-        )
+        left_action = self.agent_left.act(left_obs)
+        right_action = self.agent_right.act(right_obs)
+        # A fresh array per call: callers (e.g. PrintRobot) may keep the action they were given
+        return np.concatenate((left_action, right_action))
@@ -2,22 +2,31 @@
 driver.py
 ---------
 Implements the low-level driver logic for communicating with Dynamixel servos using the dynamixel_sdk.
-This version uses individual writes for responsiveness with fast keyboard polling.
+Once running, a single background bus thread owns the port: it reads present
+positions, runs queued operations (e.g. torque changes) and sends goal positions
+in a single SyncWrite packet, built by dxl_fast and written to the port in one call.
+A queued goal wakes the thread and is sent before its next SyncRead.
 """
 
+import os
+import queue
+import sys
 import time
-from threading import Event, Lock, Thread
-from typing import Protocol, Sequence
+from collections import deque
+from threading import Condition, Event, Thread
+from typing import Optional, Protocol, Sequence
 import numpy as np
 # dynamixel_sdk imports for hardware communication
 from dynamixel_sdk.group_sync_read import GroupSyncRead
 from dynamixel_sdk.packet_handler import PacketHandler
 from dynamixel_sdk.port_handler import PortHandler
-from dynamixel_sdk.robotis_def import (
-    COMM_SUCCESS,
-)
+from dynamixel_sdk.robotis_def import COMM_SUCCESS
+from serial.tools import list_ports
+
+from dxl_fast import SyncWriteBuffer
 
 # Corrected memory addresses for the Dynamixel motors.
+ADDR_RETURN_DELAY_TIME = 9
 ADDR_TORQUE_ENABLE = 64
 ADDR_GOAL_POSITION = 116
 LEN_GOAL_POSITION = 4
@@ -25,12 +34,63 @@ ADDR_PRESENT_POSITION = 132
 LEN_PRESENT_POSITION = 4
 TORQUE_ENABLE = 1
 TORQUE_DISABLE = 0
+RETURN_DELAY_TIME = 0  # In 2 us units; the factory default of 250 adds 500 us to every read
+GOAL_REASSERT_INTERVAL = 50  # Resend every goal after this many writes, in case a servo reset
+BUS_OP_TIMEOUT = 1.0  # Seconds to wait for the bus thread to run a queued operation
+MAX_READ_BACKOFF = 0.05  # Seconds; cap on the reader's retry delay after bus errors
+# Seconds the reader always idles between bus turns. A SyncRead at 57600 baud outlasts
+# target_period, and the SDK busy-polls the port while reading, so without this the
+# thread never sleeps and competes for the GIL with the control loop
+MIN_READ_YIELD = 0.002
+SERIAL_BUFFER_BYTES = 4096  # Driver-side rx/tx queue size requested on Windows
+
+# USB ids of the FTDI chips used by the U2D2 (FT232H) and older USB2Dynamixel (FT232R)
+FTDI_VID = 0x0403
+FTDI_PIDS = (0x6014, 0x6001)
+PORT_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "quest3_teleop", "port")
+
+
+# 4096 ticks per revolution, centred on tick 2048
+RAD_TO_TICK = 2048.0 / np.pi
+TICK_TO_RAD = np.pi / 2048.0
 
 
+def find_dynamixel_port() -> str:
+    """
+    Return the serial port of the first connected U2D2/FTDI adapter.
+    The last port found is cached on disk and reused while it is still present.
+    """
+    ports = list_ports.comports()
+    adapters = [p for p in ports if p.vid == FTDI_VID and p.pid in FTDI_PIDS]
+
+    try:
+        with open(PORT_CACHE_FILE) as f:
+            cached = f.read().strip()
+        # Only trusted while that device is still an FTDI adapter; ports get reassigned
+        if any(p.device == cached for p in adapters):
+            return cached
+    except OSError:
+        pass
+
+    if not adapters:
+        found = ", ".join(f"{p.device} ({p.description})" for p in ports) or "none"
+        raise RuntimeError(f"No U2D2/FTDI serial adapter found. Serial devices: {found}")
+
+    adapter = adapters[0]
+    print(f"Found Dynamixel adapter on {adapter.device} ({adapter.description})")
+    try:
+        os.makedirs(os.path.dirname(PORT_CACHE_FILE), exist_ok=True)
+        with open(PORT_CACHE_FILE, "w") as f:
+            f.write(adapter.device)
+    except OSError:
+        pass
+    return adapter.device
+
 
 # Protocol for any Dynamixel driver (real or fake)
 class DynamixelDriverProtocol(Protocol):
-    def set_joints(self, joint_angles: Sequence[float]): ...
+    def set_joints(self, joint_angles: Sequence[float], force: bool = False): ...
+    def flush_write(self, timeout: Optional[float] = None) -> bool: ...
     def torque_enabled(self) -> bool: ...
     def set_torque_mode(self, enable: bool): ...
     def get_joints(self) -> np.ndarray: ...
@@ -44,14 +104,19 @@ class FakeDynamixelDriver(DynamixelDriverProtocol):
         self._ids = ids
         self._joint_angles = np.zeros(len(ids), dtype=int)
         self._torque_enabled = False
-    def set_joints(self, joint_angles: Sequence[float]):
+    def set_joints(self, joint_angles: Sequence[float], force: bool = False):
         self._joint_angles = np.array(joint_angles)
+    def flush_write(self, timeout: Optional[float] = None) -> bool:
+        return True
     def torque_enabled(self) -> bool:
         return self._torque_enabled
     def set_torque_mode(self, enable: bool):
         self._torque_enabled = enable
     def get_joints(self) -> np.ndarray:
-        return self._joint_angles.copy()
+        # Read-only view; set_joints rebinds rather than mutating, so no copy is needed
+        view = self._joint_angles.view()
+        view.flags.writeable = False
+        return view
     def close(self):
         pass
 
@@ -60,11 +125,18 @@ class FakeDynamixelDriver(DynamixelDriverProtocol):
 # Real driver for hardware control of Dynamixel servos
 class DynamixelDriver(DynamixelDriverProtocol):
     def __init__(
-        self, ids: Sequence[int], port: str = "/dev/ttyUSB0", baudrate: int = 57600
+        self,
+        ids: Sequence[int],
+        port: str = "/dev/ttyUSB0",
+        baudrate: int = 57600,
+        low_latency: bool = True,
+        target_period: float = 0.002,
     ):
         self._ids = ids
         self._joint_angles = np.zeros(len(ids), dtype=int)
-        self._port_lock = Lock()
+        self._target_period = target_period
+        self._rad_to_tick = RAD_TO_TICK
+        self._tick_to_rad = TICK_TO_RAD
 
         self._portHandler = PortHandler(port)
         self._packetHandler = PacketHandler(2.0)
@@ -82,37 +154,218 @@ class DynamixelDriver(DynamixelDriverProtocol):
         if not self._portHandler.setBaudRate(baudrate):
             raise RuntimeError(f"Failed to change the baudrate to {baudrate}")
 
+        if low_latency:
+            self._enable_low_latency(port)
+        self._set_serial_buffers(port)
+        self._set_return_delay_time(RETURN_DELAY_TIME)
+        print(f"Dynamixel bus on {port}: {baudrate} baud, return delay {RETURN_DELAY_TIME * 2} us")
+
         for dxl_id in self._ids:
             if not self._groupSyncRead.addParam(dxl_id):
                 raise RuntimeError(
                     f"Failed to add read parameter for Dynamixel with ID {dxl_id}"
                 )
+        # The SDK keeps each servo's raw reply bytes in data_dict[id]; decode those
+        # directly unless this SDK version stores them differently
+        self._read_direct = isinstance(getattr(self._groupSyncRead, "data_dict", None), dict)
 
-        self._torque_enabled = False
+        # Callables run on the bus thread, which is the only thread using the port once started
+        self._bus_q = queue.SimpleQueue()
+        # Newest goal ticks waiting for the bus thread; older entries are dropped
+        self._pending_write = deque(maxlen=1)
+        self._bus_wakeup = Event()  # Wakes the bus thread when a goal or operation is queued
+        self._write_cond = Condition()
+        self._write_seq = 0  # Goals queued
+        self._sent_seq = 0  # Goals written to the bus
+        # Ticks each servo was last sent; -1 means unknown, so the next goal is always written
+        self._last_sent_ticks = np.full(len(ids), -1, dtype=np.int32)
+        self._writes_since_reassert = 0
+        self._goal_packet = SyncWriteBuffer(ADDR_GOAL_POSITION, len(ids))
+
+        self._torque_enabled: Optional[bool] = None  # Unknown until first set; servos may still be on
+        self._bus_error: Optional[Exception] = None  # Set if the bus thread dies
         self._stop_thread = Event()
+        self._first_read = Event()  # Set once the first complete read has been published
         self._start_reading_thread()
+        # Don't hand out the zero placeholder as a joint state
+        if not self._first_read.wait(BUS_OP_TIMEOUT):
+            print(f"⚠️ No joint reading from {port} within {BUS_OP_TIMEOUT}s")
+        if self._bus_error is not None:
+            self._portHandler.closePort()
+            self._check_bus()
 
-    def set_joints(self, joint_angles: Sequence[float]):
-        """Commands the servos using individual write commands for responsiveness."""
+    def _enable_low_latency(self, port: str):
+        """
+        Drop the FTDI latency timer from its 16 ms default to 1 ms (Linux only).
+        Failures are reported and ignored, e.g. for non-FTDI adapters.
+        """
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            # ASYNC_LOW_LATENCY via TIOCSSERIAL
+            self._portHandler.ser.set_low_latency_mode(True)
+        except (AttributeError, OSError, ValueError) as e:
+            print(f"Could not set ASYNC_LOW_LATENCY on {port}: {e}")
+        tty = os.path.basename(os.path.realpath(port))
+        try:
+            with open(f"/sys/bus/usb-serial/devices/{tty}/latency_timer", "w") as f:
+                f.write("1")
+        except OSError as e:
+            print(f"Could not set the latency timer for {port}: {e}")
+
+    def _set_serial_buffers(self, port: str):
+        """
+        Ask the Windows serial driver for rx/tx queues that hold a whole SyncRead reply
+        and SyncWrite packet, so neither is split across driver buffer refills.
+        pyserial only supports this on Windows; elsewhere the tty buffers are fixed.
+        """
+        if sys.platform != "win32":
+            return
+        try:
+            self._portHandler.ser.set_buffer_size(rx_size=SERIAL_BUFFER_BYTES, tx_size=SERIAL_BUFFER_BYTES)
+        except (AttributeError, OSError, ValueError) as e:
+            print(f"Could not set serial buffer sizes on {port}: {e}")
+
+    def _set_return_delay_time(self, value: int):
+        """
+        Write the Return Delay Time to every servo that differs.
+        It lives in EEPROM, so unchanged servos are left alone. EEPROM is only
+        writable with torque off, so a servo holding torque is released for the
+        write and then re-enabled.
+        """
+        for dxl_id in self._ids:
+            current, dxl_comm_result, _ = self._packetHandler.read1ByteTxRx(
+                self._portHandler, dxl_id, ADDR_RETURN_DELAY_TIME
+            )
+            if dxl_comm_result == COMM_SUCCESS and current == value:
+                continue
+            torque, dxl_comm_result, _ = self._packetHandler.read1ByteTxRx(
+                self._portHandler, dxl_id, ADDR_TORQUE_ENABLE
+            )
+            torque_on = dxl_comm_result == COMM_SUCCESS and torque == TORQUE_ENABLE
+            if torque_on:
+                self._packetHandler.write1ByteTxRx(self._portHandler, dxl_id, ADDR_TORQUE_ENABLE, TORQUE_DISABLE)
+            dxl_comm_result, dxl_error = self._packetHandler.write1ByteTxRx(
+                self._portHandler, dxl_id, ADDR_RETURN_DELAY_TIME, value
+            )
+            if torque_on:
+                self._packetHandler.write1ByteTxRx(self._portHandler, dxl_id, ADDR_TORQUE_ENABLE, TORQUE_ENABLE)
+            if dxl_comm_result != COMM_SUCCESS or dxl_error != 0:
+                print(f"Could not set return delay time on Dynamixel ID {dxl_id}")
+
+    def set_joints(self, joint_angles: Sequence[float], force: bool = False):
+        """
+        Queue goal positions for all servos and return without waiting for the bus.
+        The bus thread wakes up and sends them in one SyncWrite before its next SyncRead;
+        a newer call replaces a goal that has not gone out yet. Use flush_write()
+        to wait until it has been sent.
+        Servos whose tick value is unchanged are skipped unless `force` is set.
+        """
+        self._check_bus()
         if not self._torque_enabled:
             return
 
-        with self._port_lock:
-            for dxl_id, angle in zip(self._ids, joint_angles):
-                position_value = int((angle * 2048 / np.pi) + 2048)
-                position_value = max(0, min(4095, position_value))
-                
-                self._packetHandler.write4ByteTxRx(self._portHandler, dxl_id, ADDR_GOAL_POSITION, position_value)
+        # All goal positions in one vectorized expression, clamped to the 0..4095 tick range
+        ticks = np.clip(
+            np.rint(np.asarray(joint_angles, dtype=float) * self._rad_to_tick + 2048.0), 0, 4095
+        ).astype(np.int32)
+
+        with self._write_cond:
+            self._write_seq += 1
+            self._pending_write.append((self._write_seq, ticks, force))
+        self._bus_wakeup.set()
+
+    def flush_write(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued goal has been written. Returns False on timeout."""
+        with self._write_cond:
+            done = self._write_cond.wait_for(
+                lambda: self._sent_seq >= self._write_seq or self._bus_error is not None, timeout
+            )
+        self._check_bus()
+        return done
+
+    def _flush_pending_write(self):
+        """Send the newest queued goal, if any. Runs on the bus thread."""
+        self._bus_wakeup.clear()
+        try:
+            seq, ticks, force = self._pending_write.popleft()
+        except IndexError:
+            return
+
+        # Only servos whose goal tick changed go on the wire, plus a periodic full resend
+        self._writes_since_reassert += 1
+        if force or self._writes_since_reassert >= GOAL_REASSERT_INTERVAL:
+            self._writes_since_reassert = 0
+            changed = np.ones(len(self._ids), dtype=bool)
+        else:
+            changed = ticks != self._last_sent_ticks
+
+        if changed.any():
+            # Whole SyncWrite packet assembled in a reused buffer and handed to the port in one write
+            ids = [dxl_id for dxl_id, is_changed in zip(self._ids, changed.tolist()) if is_changed]
+            packet = self._goal_packet.pack(ids, ticks[changed].tolist())
+
+            if self._portHandler.writePort(packet) == len(packet):
+                self._last_sent_ticks[changed] = ticks[changed]
+            else:
+                print("Failed to sync write goal positions")
+                # Fall back to individual writes; goal positions need no status reply
+                for dxl_id, position_value, is_changed in zip(self._ids, ticks.tolist(), changed.tolist()):
+                    if is_changed:
+                        self._packetHandler.write4ByteTxOnly(
+                            self._portHandler, dxl_id, ADDR_GOAL_POSITION, position_value
+                        )
+                # Unconfirmed, so resend these on the next goal
+                self._last_sent_ticks[changed] = -1
+
+        with self._write_cond:
+            self._sent_seq = seq
+            self._write_cond.notify_all()
 
     def torque_enabled(self) -> bool:
-        return self._torque_enabled
+        return bool(self._torque_enabled)
 
     def set_torque_mode(self, enable: bool):
-        """Enable or disable torque for all servos individually."""
+        """
+        Enable or disable torque for all servos individually.
+        The writes run on the bus thread; this blocks until they are done.
+        Does nothing if the servos are already known to be in that mode.
+        """
+        self._check_bus()
+        if self._torque_enabled == enable:
+            return
+        if not self._reading_thread.is_alive():
+            self._write_torque(enable)
+            return
+
+        done = Event()
+        errors = []
+
+        def op():
+            try:
+                self._write_torque(enable)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                done.set()
+
+        self._bus_q.put(op)
+        self._bus_wakeup.set()
+        deadline = time.monotonic() + BUS_OP_TIMEOUT
+        # Waited in slices so a bus thread that dies meanwhile is reported, not timed out on
+        while not done.wait(0.05):
+            self._check_bus()
+            if time.monotonic() > deadline:
+                raise TimeoutError("Bus thread did not apply the torque change")
+        if errors:
+            raise errors[0]
+
+    def _write_torque(self, enable: bool):
         torque_value = TORQUE_ENABLE if enable else TORQUE_DISABLE
-        with self._port_lock:
-            for dxl_id in self._ids:
-                self._packetHandler.write1ByteTxRx(self._portHandler, dxl_id, ADDR_TORQUE_ENABLE, torque_value)
+        for dxl_id in self._ids:
+            self._packetHandler.write1ByteTxRx(self._portHandler, dxl_id, ADDR_TORQUE_ENABLE, torque_value)
+        # Resend every goal after a torque change
+        self._last_sent_ticks.fill(-1)
         self._torque_enabled = enable
 
     def _start_reading_thread(self):
@@ -121,36 +374,103 @@ class DynamixelDriver(DynamixelDriverProtocol):
         self._reading_thread.daemon = True
         self._reading_thread.start()
 
+    def _check_bus(self):
+        """Raise if the bus thread has died, e.g. because the adapter was unplugged."""
+        if self._bus_error is not None:
+            raise RuntimeError(f"Dynamixel bus thread stopped: {self._bus_error}") from self._bus_error
+
     def _read_joint_angles(self):
-        """Background thread function to continuously read joint angles from hardware."""
+        """
+        Bus thread entry point. A serial error ends the thread; it is kept and
+        re-raised to callers of set_joints, flush_write, get_joints and set_torque_mode.
+        """
+        try:
+            self._bus_loop()
+        except Exception as e:
+            self._bus_error = e
+            print(f"❌ Dynamixel bus thread stopped: {e}")
+            with self._write_cond:
+                self._write_cond.notify_all()
+            self._first_read.set()  # Don't leave __init__ waiting for a read that won't come
+
+    def _bus_loop(self):
+        """
+        Runs queued operations, continuously reads joint angles from
+        hardware and sends queued goal positions on the same bus turn.
+        """
+        backoff = self._target_period
+        # Decoded into a scratch buffer; only a complete read is copied out and published
+        scratch = np.empty_like(self._joint_angles)
         while not self._stop_thread.is_set():
-            with self._port_lock:
-                dxl_comm_result = self._groupSyncRead.txRxPacket()
-                if dxl_comm_result == COMM_SUCCESS:
-                    temp_angles = self._joint_angles.copy()
-                    read_success = True
-                    for i, dxl_id in enumerate(self._ids):
-                        if self._groupSyncRead.isAvailable(dxl_id, ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION):
-                            angle = self._groupSyncRead.getData(dxl_id, ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
-                            temp_angles[i] = np.int32(np.uint32(angle))
-                        else:
-                            read_success = False
-                            break
-                    
-                    if read_success:
-                        self._joint_angles = temp_angles
-            time.sleep(0.02)
+            t_last = time.perf_counter()
+            read_success = False
+            while True:
+                try:
+                    op = self._bus_q.get_nowait()
+                except queue.Empty:
+                    break
+                op()
+
+            # A goal that woke the thread goes out before the read, not a SyncRead later
+            self._flush_pending_write()
+
+            dxl_comm_result = self._groupSyncRead.txRxPacket()
+            if dxl_comm_result == COMM_SUCCESS:
+                read_success = self._decode_present_positions(scratch)
+
+            # Goals queued during the read ride the tail of this bus turn
+            self._flush_pending_write()
+
+            # Publish by rebinding a fresh read-only array; the rebind is atomic under
+            # the GIL, so get_joints sees the old or new snapshot without taking a lock
+            if read_success:
+                published = scratch.copy()
+                published.flags.writeable = False
+                self._joint_angles = published
+                self._first_read.set()
+
+            # Pace to target_period, always yielding a little; back off exponentially
+            # while the bus keeps failing
+            if dxl_comm_result == COMM_SUCCESS:
+                backoff = self._target_period
+                sleep_for = max(MIN_READ_YIELD, self._target_period - (time.perf_counter() - t_last))
+            else:
+                backoff = min(backoff * 2, MAX_READ_BACKOFF)
+                sleep_for = backoff
+            # Returns early when a goal or operation is queued, or close() is called
+            self._bus_wakeup.wait(sleep_for)
+
+    def _decode_present_positions(self, out: np.ndarray) -> bool:
+        """Fill `out` with the signed present-position ticks from the last SyncRead."""
+        if self._read_direct:
+            data_dict = self._groupSyncRead.data_dict
+            for i, dxl_id in enumerate(self._ids):
+                data = data_dict.get(dxl_id)
+                if data is None or len(data) < LEN_PRESENT_POSITION:
+                    return False
+                out[i] = int.from_bytes(bytes(data[:LEN_PRESENT_POSITION]), "little", signed=True)
+            return True
+
+        for i, dxl_id in enumerate(self._ids):
+            if not self._groupSyncRead.isAvailable(dxl_id, ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION):
+                return False
+            angle = self._groupSyncRead.getData(dxl_id, ADDR_PRESENT_POSITION, LEN_PRESENT_POSITION)
+            out[i] = np.int32(np.uint32(angle))
+        return True
 
     def get_joints(self) -> np.ndarray:
-        """Return the current joint angles (in radians) as read from hardware."""
-        with self._port_lock:
-             _j = self._joint_angles.copy()
-        return (_j - 2048.0) * np.pi / 2048.0
+        """Return the latest joint angles (in radians) published by the reader thread."""
+        self._check_bus()
+        _j = self._joint_angles  # Never mutated after publishing
+        # The subtraction yields a fresh float array; scale it in place
+        rad = np.subtract(_j, 2048.0)
+        return np.multiply(rad, self._tick_to_rad, out=rad)
 
     def close(self):
         """Clean up and close the hardware connection."""
         print("Closing port and stopping thread...")
         self._stop_thread.set()
+        self._bus_wakeup.set()
         if self._reading_thread.is_alive():
             self._reading_thread.join(timeout=1.0)
         try:
@@ -0,0 +1,88 @@
+"""
+dxl_fast.py
+-----------
+Builds Dynamixel Protocol 2.0 instruction packets as a single bytes object, so a
+whole SyncWrite goes to the port in one write call. The dynamixel_sdk assembles the
+same packets as Python lists, element by element, and its table-driven updateCRC
+rebuilds the 256-entry table list on every call; here the table is built once.
+"""
+
+import struct
+from typing import Sequence
+
+HEADER = b"\xff\xff\xfd\x00"
+BROADCAST_ID = 0xFE
+INST_SYNC_WRITE = 0x83
+
+_STUFF_PATTERN = b"\xff\xff\xfd"
+_STUFFED = b"\xff\xff\xfd\xfd"
+
+
+def _make_crc_table():
+    """CRC-16 (polynomial 0x8005, no reflection) lookup table, as used by Protocol 2.0."""
+    table = []
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x8005) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return tuple(table)
+
+
+_CRC_TABLE = _make_crc_table()
+
+
+def crc16(data: bytes, crc: int = 0) -> int:
+    """Protocol 2.0 CRC over `data` (header through last parameter)."""
+    table = _CRC_TABLE
+    for b in data:
+        crc = ((crc << 8) ^ table[((crc >> 8) ^ b) & 0xFF]) & 0xFFFF
+    return crc
+
+
+def build_packet(dxl_id: int, instruction: int, params: bytes) -> bytes:
+    """Return a complete instruction packet with byte stuffing and CRC applied."""
+    body = bytes((instruction,)) + params
+    # Stuffing keeps the header pattern from appearing inside the packet
+    body = body.replace(_STUFF_PATTERN, _STUFFED)
+    packet = HEADER + struct.pack("<BH", dxl_id, len(body) + 2) + body
+    return packet + struct.pack("<H", crc16(packet))
+
+
+def build_sync_write(ids: Sequence[int], address: int, length: int, values: Sequence[int]) -> bytes:
+    """SyncWrite of one signed `length`-byte value per servo, starting at `address`."""
+    params = bytearray(struct.pack("<HH", address, length))
+    for dxl_id, value in zip(ids, values):
+        params.append(dxl_id)
+        params += value.to_bytes(length, "little", signed=True)
+    return build_packet(BROADCAST_ID, INST_SYNC_WRITE, bytes(params))
+
+
+class SyncWriteBuffer:
+    """
+    Reusable SyncWrite packet for 4-byte values at a fixed address.
+    pack() fills one preallocated bytearray with struct.pack_into and returns a
+    view of it, valid until the next call; nothing is allocated per packet.
+    """
+
+    _ITEM = struct.Struct("<Bi")  # id, signed 4-byte value
+    _PARAMS_START = 12  # header(4) + id(1) + length(2) + instruction(1) + address(2) + data length(2)
+
+    def __init__(self, address: int, max_ids: int):
+        self._address = address
+        self._buf = bytearray(self._PARAMS_START + max_ids * self._ITEM.size + 2)
+        self._view = memoryview(self._buf)
+        struct.pack_into("<4sBHBHH", self._buf, 0, HEADER, BROADCAST_ID, 0, INST_SYNC_WRITE, address, 4)
+
+    def pack(self, ids: Sequence[int], values: Sequence[int]):
+        buf = self._buf
+        offset = self._PARAMS_START
+        for dxl_id, value in zip(ids, values):
+            self._ITEM.pack_into(buf, offset, dxl_id, value)
+            offset += self._ITEM.size
+        if buf.find(_STUFF_PATTERN, 7, offset) >= 0:
+            # Needs byte stuffing, which shifts everything after it; build it the slow way
+            return build_sync_write(ids, self._address, 4, values)
+        struct.pack_into("<H", buf, 5, offset - 5)  # instruction + params + CRC
+        struct.pack_into("<H", buf, offset, crc16(self._view[:offset]))
+        return self._view[:offset + 2]
@@ -8,12 +8,17 @@ This is a simplified version that works with absolute, wrapped angles.
 from typing import Dict, Optional, Sequence
 import numpy as np
 from robot import Robot
-from driver import DynamixelDriver, DynamixelDriverProtocol, FakeDynamixelDriver
+from numerics import to_motor_frame, to_robot_frame, warm_up
+from driver import (
+    DynamixelDriver,
+    DynamixelDriverProtocol,
+    FakeDynamixelDriver,
+    find_dynamixel_port,
+)
 import time
 
-def wrap_to_pi(radians_array: np.ndarray) -> np.ndarray:
-    """Wraps an angle in radians to the range [-pi, pi]."""
-    return (radians_array + np.pi) % (2 * np.pi) - np.pi
+TORQUE_OFF_WARN_INTERVAL = 5.0  # Seconds between "torque is off" warnings
+FLUSH_TIMEOUT = 1.0  # Seconds to wait for a goal to reach the bus in command_and_get_rtt
 
 class DynamixelRobot(Robot):
     """A class representing a Dynamixel-based robot."""
@@ -24,9 +29,11 @@ class DynamixelRobot(Robot):
         joint_offsets: Optional[Sequence[float]] = None,
         joint_signs: Optional[Sequence[int]] = None,
         real: bool = False,
-        port: str = "COM4",
+        port: Optional[str] = None,
         baudrate: int = 57600,
     ):
+        if real and port is None:
+            port = find_dynamixel_port()
         print(f"attempting to connect to port: {port}")
         self._joint_ids = joint_ids
         self._driver: DynamixelDriverProtocol
@@ -34,19 +41,25 @@ class DynamixelRobot(Robot):
         if joint_offsets is None:
             self._joint_offsets = np.zeros(len(joint_ids))
         else:
-            self._joint_offsets = np.array(joint_offsets)
+            self._joint_offsets = np.array(joint_offsets, dtype=float)
 
         if joint_signs is None:
             self._joint_signs = np.ones(len(joint_ids))
         else:
-            self._joint_signs = np.array(joint_signs)
+            self._joint_signs = np.array(joint_signs, dtype=float)
 
         if real:
             self._driver = DynamixelDriver(joint_ids, port=port, baudrate=baudrate)
         else:
             self._driver = FakeDynamixelDriver(joint_ids)
         
+        self._real = real
         self._torque_on = False
+        self._closed = False
+        self._last_torque_warning = 0.0
+        # Scratch buffer for the command path; the driver converts it to ticks before returning
+        self._wrap_buf = np.empty(len(joint_ids))
+        warm_up(len(joint_ids))
 
     def num_dofs(self) -> int:
         return len(self._joint_ids)
@@ -56,18 +69,29 @@ class DynamixelRobot(Robot):
         Return the current joint state, wrapped to [-pi, pi].
         This function simply reads the motor's state.
         """
-        pos_from_driver = self._driver.get_joints()
-        pos = (pos_from_driver - self._joint_offsets) * self._joint_signs
-        return wrap_to_pi(pos)
+        pos = self._driver.get_joints()
+        return to_robot_frame(pos, self._joint_offsets, self._joint_signs, np.empty(len(pos)))
 
     def command_joint_state(self, joint_state: np.ndarray) -> None:
         """
         Command the robot to a given joint state.
         The angle is wrapped to the [-pi, pi] range here, just before
         being sent to the driver.
+        On real hardware, commands are dropped while torque is off.
         """
-        set_value = (joint_state * self._joint_signs) + self._joint_offsets
-        set_value = wrap_to_pi(set_value)
+        if self._real and not self._torque_on:
+            now = time.monotonic()
+            if now - self._last_torque_warning > TORQUE_OFF_WARN_INTERVAL:
+                print("⚠️ Torque is off; ignoring joint commands")
+                self._last_torque_warning = now
+            return
+        joint_state = np.asarray(joint_state, dtype=float)
+        # The njit kernel doesn't bounds-check, so a short or long command must be caught here
+        if joint_state.shape != self._wrap_buf.shape:
+            raise ValueError(
+                f"Expected joint state of length {len(self._joint_ids)}, got shape {joint_state.shape}."
+            )
+        set_value = to_motor_frame(joint_state, self._joint_offsets, self._joint_signs, self._wrap_buf)
         self._driver.set_joints(set_value)
 
     def command_and_get_rtt(self, joint_state: np.ndarray):
@@ -77,6 +101,9 @@ class DynamixelRobot(Robot):
         """
         start_time = time.perf_counter()
         self.command_joint_state(joint_state)
+        # Wait for the goal to reach the bus
+        if not self._driver.flush_write(FLUSH_TIMEOUT):
+            raise TimeoutError(f"Goal was not written to the bus within {FLUSH_TIMEOUT}s")
         actual_pos = self.get_joint_state()
         end_time = time.perf_counter()
         
@@ -92,7 +119,12 @@ class DynamixelRobot(Robot):
     def get_observations(self) -> Dict[str, np.ndarray]:
         return {"joint_state": self.get_joint_state()}
         
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
     def close(self):
         """Closes the connection to the robot by calling the driver's close method."""
         if self._driver:
-            self._driver.close()
\ No newline at end of file
+            self._driver.close()
+        self._closed = True
\ No newline at end of file
@@ -0,0 +1,42 @@
+"""
+numerics.py
+-----------
+Small compiled kernels for the per-tick joint-frame conversions.
+Uses Numba when it is installed; otherwise the same functions run as plain Python.
+"""
+
+import math
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the kernels below then run as plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+TWO_PI = 2.0 * math.pi
+
+
+@njit(cache=True, fastmath=True)
+def to_robot_frame(pos, offsets, signs, out):
+    """Motor angles -> robot joint angles: (pos - offsets) * signs, wrapped to [-pi, pi)."""
+    for i in range(pos.shape[0]):
+        v = (pos[i] - offsets[i]) * signs[i]
+        out[i] = (v + math.pi) % TWO_PI - math.pi
+    return out
+
+
+@njit(cache=True, fastmath=True)
+def to_motor_frame(joint_state, offsets, signs, out):
+    """Robot joint angles -> motor angles: joint_state * signs + offsets, wrapped to [-pi, pi)."""
+    for i in range(joint_state.shape[0]):
+        v = joint_state[i] * signs[i] + offsets[i]
+        out[i] = (v + math.pi) % TWO_PI - math.pi
+    return out
+
+
+def warm_up(num_joints: int):
+    """Compile (or load from cache) the kernels now rather than on the first control tick."""
+    zeros = np.zeros(num_joints)
+    to_robot_frame(zeros, zeros, zeros, np.empty(num_joints))
+    to_motor_frame(zeros, zeros, zeros, np.empty(num_joints))
@@ -6,10 +6,39 @@ Defines the Robot protocol (interface) for any robot that can be controlled, as
 This is the base interface for all robot hardware or simulation logic in the system.
 """
 
+import weakref
 from abc import abstractmethod
-from typing import Dict, Protocol
+from collections import deque
+from threading import Event, Thread
+from typing import Dict, Optional, Protocol
 import numpy as np
 
+PRINT_FLUSH_INTERVAL = 0.1  # Seconds between PrintRobot output batches
+
+
+# PrintRobot's print thread helpers. They take the queue and event rather than the
+# robot, so the thread and the finalizer don't keep the robot alive.
+def _flush_print_queue(print_queue: deque) -> None:
+    states = []
+    while True:
+        try:
+            states.append(print_queue.popleft())
+        except IndexError:
+            break
+    if states:
+        print("\n".join(str(state) for state in states))
+
+
+def _print_loop(print_queue: deque, stop: Event) -> None:
+    while not stop.wait(PRINT_FLUSH_INTERVAL):
+        _flush_print_queue(print_queue)
+
+
+def _stop_print_thread(thread: Thread, print_queue: deque, stop: Event) -> None:
+    stop.set()
+    thread.join()
+    _flush_print_queue(print_queue)
+
 # Robot protocol: any robot must implement these methods.
 class Robot(Protocol):
     """Robot protocol.
@@ -38,11 +67,26 @@ class Robot(Protocol):
         raise NotImplementedError
 
 # PrintRobot: a dummy robot that just prints the commanded joint state (for testing/demo).
+# Commands are queued and printed in batches by a background thread, so a fast
+# control loop is not held up by console writes.
 class PrintRobot(Robot):
     def __init__(self, num_dofs: int, dont_print: bool = False):
         self._num_dofs = num_dofs
         self._joint_state = np.zeros(num_dofs)
         self._dont_print = dont_print
+        self._print_queue = deque(maxlen=1024)  # Oldest lines are dropped if printing falls behind
+        self._stop_printing = Event()
+        self._finalizer = None
+        if not dont_print:
+            print_thread = Thread(
+                target=_print_loop, args=(self._print_queue, self._stop_printing), daemon=True
+            )
+            print_thread.start()
+            # close() isn't part of the Robot protocol, so don't rely on callers for the final flush;
+            # the finalizer also runs at exit or when the robot is garbage collected
+            self._finalizer = weakref.finalize(
+                self, _stop_print_thread, print_thread, self._print_queue, self._stop_printing
+            )
 
     def num_dofs(self) -> int:
         return self._num_dofs
@@ -51,13 +95,29 @@ class PrintRobot(Robot):
         return self._joint_state
 
     def command_joint_state(self, joint_state: np.ndarray) -> None:
-        assert len(joint_state) == (self._num_dofs), (
-            f"Expected joint state of length {self._num_dofs}, "
-            f"got {len(joint_state)}."
-        )
+        try:
+            # numpy does the length check; no Python-level len() on the happy path
+            joint_state = np.reshape(joint_state, (self._num_dofs,))
+        except ValueError:
+            raise ValueError(
+                f"Expected joint state of length {self._num_dofs}, "
+                f"got {np.size(joint_state)}."
+            ) from None
+        # Copy in case the caller reuses its array; the print thread stringifies it later
+        joint_state = joint_state.copy()
         self._joint_state = joint_state
         if not self._dont_print:
-            print(self._joint_state)
+            self._print_queue.append(joint_state)
+
+    def flush(self):
+        """Print every queued joint state now."""
+        _flush_print_queue(self._print_queue)
+
+    def close(self):
+        """Stop the print thread and print anything still queued. Also runs at exit."""
+        if self._finalizer is not None:
+            self._finalizer()  # Runs at most once
+        self.flush()
 
     def get_observations(self) -> Dict[str, np.ndarray]:
         joint_state = self.get_joint_state()
@@ -70,6 +130,7 @@ class PrintRobot(Robot):
         }
 
 # BimanualRobot: wraps two robots (e.g., for two arms), concatenates their joint states and observations.
+# Callers polling in a loop can pass preallocated `out` buffers to skip the per-call allocation.
 class BimanualRobot(Robot):
     def __init__(self, robot_l: Robot, robot_r: Robot):
         self._robot_l = robot_l
@@ -78,23 +139,29 @@ class BimanualRobot(Robot):
     def num_dofs(self) -> int:
         return self._robot_l.num_dofs() + self._robot_r.num_dofs()
 
-    def get_joint_state(self) -> np.ndarray:
+    def get_joint_state(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Both joint states, concatenated into `out` if given, else into a new array."""
         return np.concatenate(
-            (self._robot_l.get_joint_state(), self._robot_r.get_joint_state())
+            (self._robot_l.get_joint_state(), self._robot_r.get_joint_state()), out=out
         )
 
     def command_joint_state(self, joint_state: np.ndarray) -> None:
         self._robot_l.command_joint_state(joint_state[: self._robot_l.num_dofs()])
         self._robot_r.command_joint_state(joint_state[self._robot_l.num_dofs() :])
 
-    def get_observations(self) -> Dict[str, np.ndarray]:
+    def get_observations(self, out: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+        """
+        Both robots' observations, concatenated per key. Keys present in `out`
+        are written into those buffers; the rest get new arrays.
+        """
         l_obs = self._robot_l.get_observations()
         r_obs = self._robot_r.get_observations()
         assert l_obs.keys() == r_obs.keys()
         return_obs = {}
         for k in l_obs.keys():
             try:
-                return_obs[k] = np.concatenate((l_obs[k], r_obs[k]))
+                buf = out.get(k) if out is not None else None
+                return_obs[k] = np.concatenate((l_obs[k], r_obs[k]), out=buf)
             except Exception as e:
                 print(e)
                 print(k)
@@ -0,0 +1,30 @@
+"""
+jpeg_codec.py
+-------------
+JPEG encoding for the streaming servers.
+Uses libjpeg-turbo directly through PyTurboJPEG when it is installed (SIMD DCT and
+Huffman, no OpenCV wrapper); otherwise falls back to cv2.imencode.
+"""
+
+import cv2
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJPF_BGRA, TJSAMP_420
+    _turbo = TurboJPEG()
+except (ImportError, OSError, RuntimeError):  # PyTurboJPEG or libturbojpeg missing
+    _turbo = None
+
+BACKEND = "turbojpeg" if _turbo is not None else "opencv"
+
+
+def encode_jpeg(image, quality):
+    """
+    Encode a BGR or BGRA uint8 image (as cv2.imencode would read it).
+    Returns the JPEG as bytes, or None if encoding failed.
+    """
+    if _turbo is not None:
+        pixel_format = TJPF_BGRA if image.shape[2] == 4 else TJPF_BGR
+        return _turbo.encode(image, quality=quality, pixel_format=pixel_format, jpeg_subsample=TJSAMP_420)
+
+    result, frame_jpeg = cv2.imencode('.jpg', image, [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    return frame_jpeg.tobytes() if result else None
@@ -13,10 +13,30 @@ from multiprocessing import shared_memory
 import threading
 from queue import Queue, Empty
 
+# Shared-memory frame ring: capture writes one slot while another is queued and a third
+# is being read, so a slot is never overwritten while the consumer still uses it
+FRAME_SHAPE = (720, 1280 * 2, 3)  # Side-by-side stereo, BGR
+RING_SLOTS = 3
+
+def _ring_views(shm):
+    """One ndarray per ring slot, backed by the shared memory block."""
+    frame_size = int(np.prod(FRAME_SHAPE))
+    return [np.ndarray(FRAME_SHAPE, dtype=np.uint8, buffer=shm.buf[i * frame_size:(i + 1) * frame_size])
+            for i in range(RING_SLOTS)]
+
+def _latest(q):
+    """Drain q without blocking and return the newest item, or None if it was empty."""
+    item = None
+    while True:
+        try:
+            item = q.get_nowait()
+        except Empty:
+            return item
+
 class MultiprocessZEDStereoTrack(VideoStreamTrack):
     """
-    ZED2i stereo streaming with multiprocessing for CPU-bound operations
-    Uses shared memory for zero-copy frame transfer between processes
+    ZED2i stereo streaming with ZED capture in a separate process
+    Uses shared memory for zero-copy frame transfer; recv() reads the ring directly
     """
     def __init__(self):
         super().__init__()
@@ -32,18 +52,16 @@ class MultiprocessZEDStereoTrack(VideoStreamTrack):
         
         # Shared memory for zero-copy frame transfer
         self.frame_size = self.height * self.width * 2 * 3  # stereo * BGR
-        self.shm_raw = shared_memory.SharedMemory(create=True, size=self.frame_size * 2)  # Double buffer
-        self.shm_processed = shared_memory.SharedMemory(create=True, size=self.frame_size)
+        self.shm_raw = shared_memory.SharedMemory(create=True, size=self.frame_size * RING_SLOTS)
+        self.raw_slots = _ring_views(self.shm_raw)
         
         # Control queues (lightweight metadata only)
-        self.capture_queue = mp.Queue(maxsize=5)
-        self.process_queue = mp.Queue(maxsize=5)
-        self.result_queue = mp.Queue(maxsize=5)
+        # One queued slot at most: the ring is only safe if capture never runs ahead further
+        self.capture_queue = mp.Queue(maxsize=1)
         
         # Process management
         self.running = mp.Value('i', 1)  # Shared boolean
         self.capture_process = None
-        self.process_worker = None
         
         # Local buffers for main thread
         self.current_frame = np.zeros((self.height, self.width * 2, 3), dtype=np.uint8)
@@ -54,24 +72,16 @@ class MultiprocessZEDStereoTrack(VideoStreamTrack):
         print("🔥 Multiprocess ZED2i pipeline initialized")
 
     def _start_processes(self):
-        """Start capture and processing worker processes"""
+        """Start the capture process; frames are consumed straight from the ring in recv()"""
         # ZED capture process (I/O bound)
         self.capture_process = mp.Process(
             target=self._capture_process_worker,
             args=(self.shm_raw.name, self.capture_queue, self.running)
         )
         
-        # Image processing process (CPU bound) 
-        self.process_worker = mp.Process(
-            target=self._processing_worker,
-            args=(self.shm_raw.name, self.shm_processed.name, 
-                  self.capture_queue, self.result_queue, self.running)
-        )
-        
         self.capture_process.start()
-        self.process_worker.start()
         
-        print("🚀 Multiprocess workers started")
+        print("🚀 Multiprocess capture worker started")
 
     @staticmethod
     def _capture_process_worker(shm_name, capture_queue, running):
@@ -94,15 +104,12 @@ class MultiprocessZEDStereoTrack(VideoStreamTrack):
             
             # Connect to shared memory
             shm = shared_memory.SharedMemory(name=shm_name)
-            frame_size = 720 * 1280 * 2 * 3
             
-            # Shared memory buffers (double buffering)
-            buffer_0 = np.ndarray((720, 1280 * 2, 3), dtype=np.uint8, buffer=shm.buf[:frame_size])
-            buffer_1 = np.ndarray((720, 1280 * 2, 3), dtype=np.uint8, buffer=shm.buf[frame_size:])
+            # Shared memory ring slots
+            slots = _ring_views(shm)
             current_buffer = 0
             
-            left_image = sl.Mat()
-            right_image = sl.Mat()
+            sbs_image = sl.Mat()
             
             print("📸 ZED capture process ready")
             
@@ -110,20 +117,19 @@ class MultiprocessZEDStereoTrack(VideoStreamTrack):
                 capture_start = time.time()
                 
                 if zed.grab() == sl.ERROR_CODE.SUCCESS:
-                    # Get images
-                    zed.retrieve_image(left_image, sl.VIEW.LEFT)
-                    zed.retrieve_image(right_image, sl.VIEW.RIGHT)
+                    if capture_queue.full():
+                        # Consumer hasn't taken the last frame yet; a put would fail anyway,
+                        # so don't spend retrieve + conversion on a frame that gets dropped
+                        continue
                     
-                    # Choose buffer
-                    output_buffer = buffer_0 if current_buffer == 0 else buffer_1
+                    # Get both eyes already side by side
+                    zed.retrieve_image(sbs_image, sl.VIEW.SIDE_BY_SIDE)
                     
-                    # Direct copy to shared memory (zero-copy!)
-                    left_data = left_image.get_data()
-                    right_data = right_image.get_data()
+                    # Choose buffer
+                    output_buffer = slots[current_buffer]
                     
-                    # Fast RGB→BGR and concatenate in shared memory
-                    output_buffer[:, :1280] = left_data[:, :, [2, 1, 0]]  # BGR conversion
-                    output_buffer[:, 1280:] = right_data[:, :, [2, 1, 0]]
+                    # RGBA→BGR straight into the shared memory slot (no temporaries)
+                    cv2.cvtColor(sbs_image.get_data(), cv2.COLOR_RGBA2BGR, dst=output_buffer)
                     
                     capture_time = (time.time() - capture_start) * 1000
                     
@@ -134,13 +140,13 @@ class MultiprocessZEDStereoTrack(VideoStreamTrack):
                             'timestamp': time.time(),
                             'capture_time': capture_time
                         })
-                        current_buffer = 1 - current_buffer  # Flip buffer
+                        current_buffer = (current_buffer + 1) % RING_SLOTS  # Advance ring
                     except:
-                        pass  # Queue full
-                
-                # Target 60fps
-                elapsed = time.time() - capture_start
-                time.sleep(max(0, 1/60 - elapsed))
+                        pass  # Queue full: keep the slot and overwrite it with the next frame
+                else:
+                    time.sleep(0.001)  # Avoid spinning on a failed grab
+                # No extra pacing: grab() already blocks until the next 60fps frame,
+                # and sleeping on top of it lets stale frames pile up in the SDK
                 
         except Exception as e:
             print(f"❌ Capture process error: {e}")
@@ -150,66 +156,6 @@ class MultiprocessZEDStereoTrack(VideoStreamTrack):
             if 'shm' in locals():
                 shm.close()
 
-    @staticmethod 
-    def _processing_worker(shm_raw_name, shm_proc_name, capture_queue, result_queue, running):
-        """Dedicated process for image processing (CPU intensive, bypasses GIL)"""
-        try:
-            # Connect to shared memory
-            shm_raw = shared_memory.SharedMemory(name=shm_raw_name)
-            shm_processed = shared_memory.SharedMemory(name=shm_proc_name)
-            
-            frame_size = 720 * 1280 * 2 * 3
-            
-            # Input buffers (from capture)
-            input_buffer_0 = np.ndarray((720, 1280 * 2, 3), dtype=np.uint8, buffer=shm_raw.buf[:frame_size])
-            input_buffer_1 = np.ndarray((720, 1280 * 2, 3), dtype=np.uint8, buffer=shm_raw.buf[frame_size:])
-            
-            # Output buffer (to main thread)
-            output_buffer = np.ndarray((720, 1280 * 2, 3), dtype=np.uint8, buffer=shm_processed.buf)
-            
-            print("⚙️ Processing worker ready")
-            
-            while running.value:
-                try:
-                    # Get capture metadata
-                    capture_data = capture_queue.get(timeout=0.1)
-                    
-                    process_start = time.time()
-                    
-                    # Select input buffer
-                    input_buffer = input_buffer_0 if capture_data['buffer_id'] == 0 else input_buffer_1
-                    
-                    # Fast processing: add overlays
-                    output_buffer[:] = input_buffer  # Copy frame
-                    
-                    # Minimal overlays (optimized)
-                    cv2.putText(output_buffer, "L", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-                    cv2.putText(output_buffer, "R", (1290, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                    
-                    process_time = (time.time() - process_start) * 1000
-                    total_time = capture_data['capture_time'] + process_time
-                    
-                    # Send result metadata
-                    try:
-                        result_queue.put_nowait({
-                            'timestamp': capture_data['timestamp'],
-                            'total_time': total_time,
-                            'ready': True
-                        })
-                    except:
-                        pass  # Queue full
-                        
-                except:
-                    continue  # Timeout or queue empty
-                    
-        except Exception as e:
-            print(f"❌ Processing worker error: {e}")
-        finally:
-            if 'shm_raw' in locals():
-                shm_raw.close()
-            if 'shm_processed' in locals():
-                shm_processed.close()
-
     async def recv(self):
         """Main thread: WebRTC streaming (I/O bound, async friendly)"""
         # Timing control
@@ -222,27 +168,19 @@ class MultiprocessZEDStereoTrack(VideoStreamTrack):
         pts = self._frame_count * 1500
         time_base = fractions.Fraction(1, 90000)
 
-        # Check for processed frame
-        frame_ready = False
-        total_time = 0
-        
-        try:
-            # Get latest result (non-blocking)
-            while not self.result_queue.empty():
-                result = self.result_queue.get_nowait()
-                frame_ready = result['ready']
-                total_time = result['total_time']
-        except:
-            pass
+        # Newest captured frame, if any (non-blocking); older entries are skipped
+        capture_data = _latest(self.capture_queue)
 
-        if frame_ready:
-            # Copy from shared memory to local buffer
-            processed_array = np.ndarray(
-                (self.height, self.width * 2, 3), 
-                dtype=np.uint8, 
-                buffer=self.shm_processed.buf
-            )
-            self.current_frame[:] = processed_array
+        if capture_data is not None:
+            process_start = time.time()
+            
+            # Copy the ring slot out before capture can come back around to it
+            self.current_frame[:] = self.raw_slots[capture_data['buffer_id']]
+            
+            # Minimal overlays
+            cv2.putText(self.current_frame, "L", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+            cv2.putText(self.current_frame, "R", (1290, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+            total_time = capture_data['capture_time'] + (time.time() - process_start) * 1000
             
             # Add performance overlay
             fps = self._frame_count / (time.time() - self._start_time) if self._frame_count > 0 else 0
@@ -261,7 +199,7 @@ class MultiprocessZEDStereoTrack(VideoStreamTrack):
             current_time = time.time()
             if current_time - self._last_log_time > 0:
                 actual_fps = 300 / (current_time - self._last_log_time)
-                queue_sizes = f"Cap:{self.capture_queue.qsize()}, Res:{self.result_queue.qsize()}"
+                queue_sizes = f"Cap:{self.capture_queue.qsize()}"
                 print(f"🔥 MP Frame {self._frame_count}: {actual_fps:.1f}fps, Queues=[{queue_sizes}]")
                 self._last_log_time = current_time
         
@@ -278,18 +216,11 @@ class MultiprocessZEDStereoTrack(VideoStreamTrack):
                 if self.capture_process.is_alive():
                     self.capture_process.terminate()
             
-            if self.process_worker and self.process_worker.is_alive():
-                self.process_worker.join(timeout=2)
-                if self.process_worker.is_alive():
-                    self.process_worker.terminate()
-            
             # Clean up shared memory
             if hasattr(self, 'shm_raw'):
+                self.raw_slots = None  # Release the views before closing the block
                 self.shm_raw.close()
                 self.shm_raw.unlink()
-            if hasattr(self, 'shm_processed'):
-                self.shm_processed.close()
-                self.shm_processed.unlink()
                 
         except Exception as e:
             print(f"⚠️ Cleanup warning: {e}")
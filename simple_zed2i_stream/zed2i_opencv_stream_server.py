@@ -24,6 +24,7 @@ import http.server
 import socketserver
 from urllib.parse import urlparse, parse_qs
 import json
+from jpeg_codec import BACKEND as JPEG_BACKEND, encode_jpeg
 
 # CONFIGURATION
 DEVICE_ID = 0  # ZED2i camera device ID
@@ -35,6 +36,8 @@ FRAME_HEIGHT = 720
 FPS = 60
 JPEG_QUALITY = 90
 CHUNK_SIZE = 60000  # 60 KB for UDP chunks
+SEND_BUFFER_BYTES = 1 << 20  # Room for a whole frame's burst of UDP chunks
+HAS_SENDMSG = hasattr(socket.socket, "sendmsg")  # Not available on Windows
 
 class ZED2iOpenCVStreamer:
     """
@@ -50,7 +53,8 @@ class ZED2iOpenCVStreamer:
         self.camera = None
         self.is_running = False
         self.current_frame = None
-        self.frame_lock = threading.Lock()
+        self.frame_seq = 0  # Incremented for every new encoded frame
+        self.frame_cond = threading.Condition()  # Guards current_frame; notified on each new frame
         self.last_frame_time = 0.0
         
         # Performance tracking
@@ -189,11 +193,19 @@ class ZED2iOpenCVStreamer:
         
         return frame, left_image, right_image
     
+    def wait_for_frame(self, last_seq, timeout=1.0):
+        """
+        Block until a frame newer than `last_seq` is available.
+        Returns (seq, jpeg_bytes), or (last_seq, None) on timeout.
+        """
+        with self.frame_cond:
+            if not self.frame_cond.wait_for(lambda: self.frame_seq != last_seq, timeout):
+                return last_seq, None
+            return self.frame_seq, self.current_frame
+    
     def start_capture_loop(self):
         """Start the continuous capture loop in a separate thread."""
         def capture_loop():
-            encode_param = [int(cv.IMWRITE_JPEG_QUALITY), JPEG_QUALITY]
-            
             while self.is_running:
                 try:
                     t0 = time.perf_counter()
@@ -207,15 +219,17 @@ class ZED2iOpenCVStreamer:
                     t1 = time.perf_counter()
                     
                     # Encode to JPEG
-                    result, frame_jpeg = cv.imencode('.jpg', stereo_frame, encode_param)
-                    if not result:
+                    frame_data = encode_jpeg(stereo_frame, JPEG_QUALITY)
+                    if frame_data is None:
                         continue
                     
                     t2 = time.perf_counter()
                     
-                    # Update current frame for streaming
-                    with self.frame_lock:
-                        self.current_frame = frame_jpeg.tobytes()
+                    # Update current frame for streaming and wake the senders
+                    with self.frame_cond:
+                        self.current_frame = frame_data
+                        self.frame_seq += 1
+                        self.frame_cond.notify_all()
                     
                     # Performance tracking
                     self.frame_count += 1
@@ -259,7 +273,10 @@ class ZED2iOpenCVStreamer:
 
 class HTTPStreamHandler(http.server.BaseHTTPRequestHandler):
     """HTTP handler for streaming ZED2i frames."""
-    
+
+    # TCP_NODELAY: push each JPEG out immediately instead of letting Nagle hold the tail
+    disable_nagle_algorithm = True
+
     def do_GET(self):
         """Handle HTTP GET requests."""
         parsed_path = urlparse(self.path)
@@ -283,27 +300,35 @@ class HTTPStreamHandler(http.server.BaseHTTPRequestHandler):
         self.end_headers()
         
         try:
-            while True:
-                with streamer.frame_lock:
-                    if streamer.current_frame is not None:
-                        frame_data = streamer.current_frame
-                    else:
-                        continue
-                
-                self.wfile.write(b'--frame\r\n')
-                self.send_header('Content-Type', 'image/jpeg')
-                self.send_header('Content-Length', str(len(frame_data)))
-                self.end_headers()
-                self.wfile.write(frame_data)
-                self.wfile.write(b'\r\n')
+            last_seq = 0
+            while streamer.is_running:
+                # Sleep until the capture thread publishes a new frame; never resend one
+                last_seq, frame_data = streamer.wait_for_frame(last_seq)
+                if frame_data is None:
+                    continue
                 
-                time.sleep(1.0 / FPS)  # Control frame rate
+                # One gathered send per part instead of four writes, without copying the JPEG
+                part_header = b'--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n' % len(frame_data)
+                self.send_parts((part_header, frame_data, b'\r\n'))
         except Exception as e:
             print(f"Streaming error: {e}")
     
+    def send_parts(self, parts):
+        """Send the buffers back to back with sendmsg, resuming after partial sends."""
+        if not HAS_SENDMSG:
+            self.wfile.write(b''.join(parts))
+            return
+        views = [memoryview(part) for part in parts]
+        while views:
+            sent = self.connection.sendmsg(views)
+            while views and sent >= len(views[0]):
+                sent -= len(views.pop(0))
+            if sent:
+                views[0] = views[0][sent:]
+    
     def serve_single_frame(self):
         """Serve a single JPEG frame."""
-        with streamer.frame_lock:
+        with streamer.frame_cond:
             if streamer.current_frame is not None:
                 frame_data = streamer.current_frame
             else:
@@ -374,6 +399,7 @@ class HTTPStreamHandler(http.server.BaseHTTPRequestHandler):
 def start_udp_server(streamer):
     """Start UDP streaming server."""
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_BYTES)
     sock.bind((LISTEN_IP, UDP_PORT))
     print(f"📹 UDP Server listening at {LISTEN_IP}:{UDP_PORT}")
     
@@ -384,31 +410,33 @@ def start_udp_server(streamer):
     
     try:
         frame_id = 0
+        last_seq = 0
         while streamer.is_running:
-            with streamer.frame_lock:
-                if streamer.current_frame is not None:
-                    frame_data = streamer.current_frame
-                else:
-                    time.sleep(0.01)
-                    continue
+            # Paced by the camera: wait for the next new frame instead of polling
+            last_seq, frame_data = streamer.wait_for_frame(last_seq)
+            if frame_data is None:
+                continue
             
-            # Send frame in chunks
+            # Send frame in chunks (slices of a memoryview, not copies)
+            frame_view = memoryview(frame_data)
             total_size = len(frame_data)
             num_chunks = (total_size + CHUNK_SIZE - 1) // CHUNK_SIZE
             
             for i in range(num_chunks):
                 start = i * CHUNK_SIZE
                 end = start + CHUNK_SIZE
-                chunk = frame_data[start:end]
+                chunk = frame_view[start:end]
                 
                 # Create header: [frame_id (4 bytes), chunk_index (1 byte), total_chunks (1 byte)]
                 header = struct.pack('<IBB', frame_id, i, num_chunks)
                 
-                # Send header + chunk data
-                sock.sendto(header + chunk, client_address)
+                # Send header + chunk data as one datagram, gathered by the kernel
+                if HAS_SENDMSG:
+                    sock.sendmsg([header, chunk], [], 0, client_address)
+                else:
+                    sock.sendto(header + chunk, client_address)
             
             frame_id = (frame_id + 1) % 4294967295
-            time.sleep(1.0 / FPS)  # Control frame rate
             
     except Exception as e:
         print(f"UDP streaming error: {e}")
@@ -461,6 +489,7 @@ def main():
     
     print("=== ZED2i OpenCV Streaming Server ===")
     print("Similar to ZED2i driver but for streaming instead of ROS")
+    print(f"JPEG encoder: {JPEG_BACKEND}")
     print()
     
     # Detect available cameras first
@@ -29,9 +29,11 @@ class ZEDStereoStreamTrack(VideoStreamTrack):
         self.zed = sl.Camera()
         self._setup_zed_camera()
         
-        # Create ZED image containers
-        self.left_image = sl.Mat()
-        self.right_image = sl.Mat()
+        # Create ZED image container (left and right side by side, RGBA)
+        self.sbs_image = sl.Mat()
+        # BGR side-by-side output, converted into in place every frame
+        # (VideoFrame.from_ndarray copies it, so it can be reused)
+        self._stereo_buf = np.empty((self.height, self.width * 2, 3), dtype=np.uint8)
         
         print("🎥 ZED2i camera initialized for 60fps stereo streaming")
 
@@ -68,16 +70,11 @@ class ZEDStereoStreamTrack(VideoStreamTrack):
 
         # Capture from ZED camera
         if self.zed.grab() == sl.ERROR_CODE.SUCCESS:
-            # Retrieve left and right images
-            self.zed.retrieve_image(self.left_image, sl.VIEW.LEFT)
-            self.zed.retrieve_image(self.right_image, sl.VIEW.RIGHT)
+            # Retrieve left and right already side by side (2560x720 total)
+            self.zed.retrieve_image(self.sbs_image, sl.VIEW.SIDE_BY_SIDE)
             
-            # Convert to numpy arrays (ZED gives RGBA, convert to BGR for OpenCV)
-            left_bgr = cv2.cvtColor(self.left_image.get_data(), cv2.COLOR_RGBA2BGR)
-            right_bgr = cv2.cvtColor(self.right_image.get_data(), cv2.COLOR_RGBA2BGR)
-            
-            # Create side-by-side stereo image (2560x720 total)
-            stereo_frame = np.concatenate((left_bgr, right_bgr), axis=1)
+            # ZED gives RGBA; convert to BGR straight into the reused buffer (no concatenate)
+            stereo_frame = cv2.cvtColor(self.sbs_image.get_data(), cv2.COLOR_RGBA2BGR, dst=self._stereo_buf)
             
         else:
             # Fallback if camera capture fails
@@ -1,9 +1,10 @@
 import socket
 import time
-import cv2
-import numpy as np
+import threading
+import queue
 import pyzed.sl as sl
 import struct
+from jpeg_codec import BACKEND as JPEG_BACKEND, encode_jpeg
 
 # CONFIGURATION
 LISTEN_IP = '0.0.0.0'
@@ -12,6 +13,98 @@ RESOLUTION = sl.RESOLUTION.HD720
 FPS = 60 # A more reasonable target for UDP streaming
 JPEG_QUALITY = 90 # Lower quality = smaller packets = less chance of loss
 CHUNK_SIZE = 60000 # 60 KB, safely below the 64KB UDP limit
+SEND_BUFFER_BYTES = 1 << 20 # Room for a whole frame's burst of chunks
+HAS_SENDMSG = hasattr(socket.socket, "sendmsg") # Not available on Windows
+NUM_SLOTS = 3 # Frame Mats: one being captured, one queued, one being encoded
+
+def send_loop(sock, client_address, slots, frame_q, free_q, stop, errors):
+    """Encode + send thread. An error is recorded in `errors` and sets `stop`, so capture exits too."""
+    try:
+        send_frames(sock, client_address, slots, frame_q, free_q, stop)
+    except Exception as e:
+        errors.append(e)
+        stop.set()
+
+def send_frames(sock, client_address, slots, frame_q, free_q, stop):
+    """Takes the newest captured slot, JPEG-encodes it and sends it in chunks until `stop` is set."""
+    frame_id = 0
+
+    # Latency check variables
+    frame_count = 0
+    LOG_INTERVAL = 60 # Print a report every 60 frames
+
+    # FPS tracking variables
+    fps_start_time = time.perf_counter()
+    fps_frame_count = 0
+
+    while not stop.is_set():
+        try:
+            slot, t0, t1, t2 = frame_q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        t3 = time.perf_counter() # time encoder picked the frame up
+
+        try:
+            frame_data = encode_jpeg(slots[slot].get_data(), JPEG_QUALITY)
+        finally:
+            free_q.put(slot) # The slot may be captured into again
+        if frame_data is None: continue
+        t4 = time.perf_counter() # time after encode
+
+        frame_view = memoryview(frame_data) # Chunks are slices of this, not copies
+        total_size = len(frame_data)
+        num_chunks = (total_size + CHUNK_SIZE - 1) // CHUNK_SIZE
+
+        # --- Send the frame in chunks ---
+        for i in range(num_chunks):
+            t5 = time.perf_counter() # time before send
+            start = i * CHUNK_SIZE
+            end = start + CHUNK_SIZE
+            chunk = frame_view[start:end]
+
+            # Create a header: [frame_id (4 bytes), chunk_index (1 byte), total_chunks (1 byte)]
+            header = struct.pack('<IBB', frame_id, i, num_chunks)
+
+            # Send header + chunk data as one datagram, gathered by the kernel
+            if HAS_SENDMSG:
+                sock.sendmsg([header, chunk], [], 0, client_address)
+            else:
+                sock.sendto(header + chunk, client_address)
+            t6 = time.perf_counter() # time after send chunk
+        t7 = time.perf_counter() # time after send
+
+        frame_id = (frame_id + 1) % 4294967295 # Loop frame_id
+        # --- Log latency values periodically ---
+        frame_count += 1
+        fps_frame_count += 1
+
+        if frame_count % LOG_INTERVAL == 0:
+            # Calculate FPS
+            fps_end_time = time.perf_counter()
+            fps = fps_frame_count / (fps_end_time - fps_start_time)
+
+            grab_latency = (t1 - t0) * 1000
+            retrieve_latency = (t2 - t1) * 1000
+            queue_latency = (t3 - t2) * 1000
+            encode_latency = (t4 - t3) * 1000
+            chunk_send_latency = (t6 - t5) * 1000
+            send_latency = (t7 - t4) * 1000
+            total_latency = (t7 - t0) * 1000
+
+            print("--- Server Performance Report ---")
+            print(f"  FPS        : {fps:.1f}")
+            print(f"  Grab       : {grab_latency:.2f} ms")
+            print(f" Retrieve   : {retrieve_latency:.2f} ms")
+            print(f"  Queue wait : {queue_latency:.2f} ms")
+            print(f"  JPEG Encode: {encode_latency:.2f} ms")
+            print(f"  Chunk Send : {chunk_send_latency:.2f} ms")
+            print(f"  Send       : {send_latency:.2f} ms")
+            print(f"  ---------------------------")
+            print(f"  Total Server : {total_latency:.2f} ms\n")
+
+            # Reset FPS tracking
+            fps_start_time = time.perf_counter()
+            fps_frame_count = 0
 
 def main():
     print("Initializing ZED camera...")
@@ -26,99 +119,58 @@ def main():
 
     # --- Create UDP Socket ---
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_BYTES)
     sock.bind((LISTEN_IP, UDP_PORT))
-    print(f"📹 UDP Server listening at {LISTEN_IP}:{UDP_PORT}")
+    print(f"📹 UDP Server listening at {LISTEN_IP}:{UDP_PORT} (JPEG via {JPEG_BACKEND})")
 
     # --- Handshake: Wait for a ping from the client to get its address ---
     print("Waiting for a ping from the client...")
     data, client_address = sock.recvfrom(1024)
     print(f"✅ Client connected from {client_address}")
 
-    try:
-        left_image, right_image = sl.Mat(), sl.Mat()
-        encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY]
-        frame_id = 0
-
-        # Latency check variables
-        frame_count = 0
-        LOG_INTERVAL = 60 # Print a report every 60 frames
-        
-        # FPS tracking variables
-        fps_start_time = time.perf_counter()
-        fps_frame_count = 0
+    # Capture runs here; encoding and sending run on their own thread, so a slow encode
+    # never delays the next grab(). Only slot indices go through the queues.
+    slots = [sl.Mat() for _ in range(NUM_SLOTS)] # The SDK composes left|right into these
+    free_q = queue.SimpleQueue()
+    for slot in range(NUM_SLOTS):
+        free_q.put(slot)
+    frame_q = queue.Queue(maxsize=1) # Newest frame only; older ones are dropped
+    stop = threading.Event()
+    send_errors = []
+    sender = threading.Thread(target=send_loop, args=(sock, client_address, slots, frame_q, free_q, stop, send_errors), daemon=True)
+    sender.start()
 
+    try:
         while True:
+            if stop.is_set() or not sender.is_alive():
+                # Don't keep grabbing frames nobody sends
+                raise RuntimeError("Encode/send thread stopped") from (send_errors[0] if send_errors else None)
+            slot = free_q.get()
             t0 = time.perf_counter()
-            if zed.grab() == sl.ERROR_CODE.SUCCESS:
-                t1 = time.perf_counter() # time after grab
-
-                zed.retrieve_image(left_image, sl.VIEW.LEFT)
-                zed.retrieve_image(right_image, sl.VIEW.RIGHT)
-                t2 = time.perf_counter() # time after retrieve
-
-                sbs_image = np.concatenate((left_image.get_data(), right_image.get_data()), axis=1)
-                t3 = time.perf_counter() # time after stitch
-
-                result, frame_jpeg = cv2.imencode('.jpg', sbs_image, encode_param)
-                if not result: continue
-                t4 = time.perf_counter() # time after encode
-
-                frame_data = frame_jpeg.tobytes()
-                total_size = len(frame_data)
-                num_chunks = (total_size + CHUNK_SIZE - 1) // CHUNK_SIZE
-                
-                # --- Send the frame in chunks ---
-                for i in range(num_chunks):
-                    t5 = time.perf_counter() # time before send
-                    start = i * CHUNK_SIZE
-                    end = start + CHUNK_SIZE
-                    chunk = frame_data[start:end]
-                    
-                    # Create a header: [frame_id (4 bytes), chunk_index (1 byte), total_chunks (1 byte)]
-                    header = struct.pack('<IBB', frame_id, i, num_chunks)
-                    
-                    # Send header + chunk data
-                    sock.sendto(header + chunk, client_address)
-                    t6 = time.perf_counter() # time after send chunk
-                t7 = time.perf_counter() # time after send
-
-                frame_id = (frame_id + 1) % 4294967295 # Loop frame_id
-                # --- Log latency values periodically ---
-                frame_count += 1
-                fps_frame_count += 1
-                
-                if frame_count % LOG_INTERVAL == 0:
-                    # Calculate FPS
-                    fps_end_time = time.perf_counter()
-                    fps = fps_frame_count / (fps_end_time - fps_start_time)
-                    
-                    grab_latency = (t1 - t0) * 1000
-                    retrieve_latency = (t2 - t1) * 1000
-                    stitch_latency = (t3 - t2) * 1000
-                    encode_latency = (t4 - t3) * 1000
-                    chunk_send_latency = (t6 - t5) * 1000
-                    send_latency = (t7 - t4) * 1000
-                    total_latency = (t7 - t0) * 1000
-
-                    print("--- Server Performance Report ---")
-                    print(f"  FPS        : {fps:.1f}")
-                    print(f"  Grab       : {grab_latency:.2f} ms")
-                    print(f" Retrieve   : {retrieve_latency:.2f} ms")
-                    print(f"  Stitching  : {stitch_latency:.2f} ms")
-                    print(f"  JPEG Encode: {encode_latency:.2f} ms")
-                    print(f"  Chunk Send : {chunk_send_latency:.2f} ms")
-                    print(f"  Send       : {send_latency:.2f} ms")
-                    print(f"  ---------------------------")
-                    print(f"  Total Server : {total_latency:.2f} ms\n")
-                    
-                    # Reset FPS tracking
-                    fps_start_time = time.perf_counter()
-                    fps_frame_count = 0
-                
+            if zed.grab() != sl.ERROR_CODE.SUCCESS:
+                free_q.put(slot)
+                continue
+            t1 = time.perf_counter() # time after grab
+
+            zed.retrieve_image(slots[slot], sl.VIEW.SIDE_BY_SIDE)
+            t2 = time.perf_counter() # time after retrieve
+
+            try:
+                frame_q.put_nowait((slot, t0, t1, t2))
+            except queue.Full:
+                # Encoder is behind: drop the queued frame rather than stall capture
+                try:
+                    free_q.put(frame_q.get_nowait()[0])
+                except queue.Empty:
+                    pass # Encoder took it in the meantime
+                frame_q.put_nowait((slot, t0, t1, t2))
+
     except KeyboardInterrupt:
         print('\n🛑 Streaming stopped by user.')
     finally:
         print("Cleaning up...")
+        stop.set()
+        sender.join(timeout=1.0)
         sock.close()
         zed.close()
 
@@ -1,10 +1,9 @@
 
 import socket
 import time
-import cv2
-import numpy as np
 import pyzed.sl as sl
 import struct
+from jpeg_codec import BACKEND as JPEG_BACKEND, encode_jpeg
 import argparse
 
 # --- CONFIGURATION MAPPINGS ---
@@ -31,7 +30,7 @@ MODES = {
 # IMPORTANT: To use H.264, you need a dedicated library with Python bindings 
 # for hardware-accelerated encoding, such as python-ffmpeg or GStreamer.
 # The code below remains with JPEG for compatibility, but the ideal implementation
-# would replace the cv2.imencode call with an H.264 encoder.
+# would replace the encode_jpeg call with an H.264 encoder.
 #
 # Example with a hypothetical H.264 encoder library:
 # h264_encoder = H264Encoder(width, height, bitrate)
@@ -49,6 +48,8 @@ def main(mode):
     LISTEN_IP = '0.0.0.0'
     UDP_PORT = 8080
     CHUNK_SIZE = 60000  # 60 KB, safely below the 64KB UDP limit
+    SEND_BUFFER_BYTES = 1 << 20  # Room for a whole frame's burst of chunks
+    HAS_SENDMSG = hasattr(socket.socket, "sendmsg")  # Not available on Windows
 
     print(f"--- Starting Server in '{mode}' mode ---")
     print(f"Resolution: {RESOLUTION}, FPS: {FPS}, JPEG Quality: {JPEG_QUALITY}")
@@ -66,8 +67,9 @@ def main(mode):
 
     # --- Create UDP Socket ---
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER_BYTES)
     sock.bind((LISTEN_IP, UDP_PORT))
-    print(f"📹 UDP Server listening at {LISTEN_IP}:{UDP_PORT}")
+    print(f"📹 UDP Server listening at {LISTEN_IP}:{UDP_PORT} (JPEG via {JPEG_BACKEND})")
 
     # --- Handshake: Wait for a ping from the client ---
     print("Waiting for a ping from the client...")
@@ -75,27 +77,25 @@ def main(mode):
     print(f"✅ Client connected from {client_address}")
 
     try:
-        left_image, right_image = sl.Mat(), sl.Mat()
-        encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY]
+        # The SDK composes left|right into this one Mat, reused every frame
+        sbs_mat = sl.Mat()
         frame_id = 0
         fps_start_time = time.perf_counter()
         fps_frame_count = 0
 
         while True:
             if zed.grab() == sl.ERROR_CODE.SUCCESS:
-                zed.retrieve_image(left_image, sl.VIEW.LEFT)
-                zed.retrieve_image(right_image, sl.VIEW.RIGHT)
-
-                # Create side-by-side stereo image
-                sbs_image = np.concatenate((left_image.get_data(), right_image.get_data()), axis=1)
+                # Side-by-side stereo image, retrieved directly (no concatenate copy)
+                zed.retrieve_image(sbs_mat, sl.VIEW.SIDE_BY_SIDE)
+                sbs_image = sbs_mat.get_data()
 
                 # --- Encode the frame ---
                 # Replace this with your H.264 encoder for better performance
-                result, frame_jpeg = cv2.imencode('.jpg', sbs_image, encode_param)
-                if not result:
+                frame_data = encode_jpeg(sbs_image, JPEG_QUALITY)
+                if frame_data is None:
                     continue
 
-                frame_data = frame_jpeg.tobytes()
+                frame_view = memoryview(frame_data)  # Chunks are slices of this, not copies
                 total_size = len(frame_data)
                 num_chunks = (total_size + CHUNK_SIZE - 1) // CHUNK_SIZE
                 
@@ -103,11 +103,14 @@ def main(mode):
                 for i in range(num_chunks):
                     start = i * CHUNK_SIZE
                     end = start + CHUNK_SIZE
-                    chunk = frame_data[start:end]
+                    chunk = frame_view[start:end]
                     
                     # Header: [frame_id (4 bytes), chunk_index (1 byte), total_chunks (1 byte)]
                     header = struct.pack('<IBB', frame_id, i, num_chunks)
-                    sock.sendto(header + chunk, client_address)
+                    if HAS_SENDMSG:
+                        sock.sendmsg([header, chunk], [], 0, client_address)
+                    else:
+                        sock.sendto(header + chunk, client_address)
 
                 frame_id = (frame_id + 1) % 4294967295
                 
@@ -2,8 +2,6 @@ import asyncio
 import json
 import logging
 import time
-import cv2
-import numpy as np
 import pyzed.sl as sl
 from aiortc import RTCPeerConnection, RTCSessionDescription, VideoStreamTrack
 from av import VideoFrame
@@ -32,8 +30,7 @@ class ZEDVideoStreamTrack(VideoStreamTrack):
         super().__init__()
         self.zed = zed
         self.mode = mode
-        self.left_image = sl.Mat()
-        self.right_image = sl.Mat()
+        self.sbs_image = sl.Mat()
         self._start_time = time.time()
         self._frame_count = 0
 
@@ -41,17 +38,13 @@ class ZEDVideoStreamTrack(VideoStreamTrack):
         pts, time_base = await self.next_timestamp()
 
         if self.zed.grab() == sl.ERROR_CODE.SUCCESS:
-            self.zed.retrieve_image(self.left_image, sl.VIEW.LEFT)
-            self.zed.retrieve_image(self.right_image, sl.VIEW.RIGHT)
+            # Side-by-side stereo image, composed by the SDK into one reused Mat
+            self.zed.retrieve_image(self.sbs_image, sl.VIEW.SIDE_BY_SIDE)
+            sbs_image_rgba = self.sbs_image.get_data()
 
-            # Create side-by-side stereo image
-            sbs_image_rgba = np.concatenate((self.left_image.get_data(), self.right_image.get_data()), axis=1)
-            
-            # Convert RGBA to BGR for OpenCV processing
-            sbs_image_bgr = cv2.cvtColor(sbs_image_rgba, cv2.COLOR_RGBA2BGR)
-
-            # Create a VideoFrame from the numpy array
-            frame = VideoFrame.from_ndarray(sbs_image_bgr, format="bgr24")
+            # Hand the 4-channel data straight to the encoder; it converts to YUV anyway,
+            # so an RGBA->BGR pass here would only be an extra full-frame copy
+            frame = VideoFrame.from_ndarray(sbs_image_rgba, format="rgba")
             frame.pts = pts
             frame.time_base = time_base
             